@@ -4,14 +4,14 @@ from bson.objectid import ObjectId
 from pydantic import BaseModel
 from datetime import datetime
 from app.core.auth_middleware import is_moderator
-from app.models.mlmodel import ModelSchema
+from app.models.mlmodel import ModelSchema, ModelSummaryResponse, ModelDetailResponse
 
 router = APIRouter()
 
 # CRUD Operations
 
 
-@router.post("/", summary="Create a new ML model", dependencies=[Depends(is_moderator)])
+@router.post("/", summary="Create a new ML model", response_model=ModelDetailResponse, dependencies=[Depends(is_moderator)])
 async def create_ml_model(model: ModelSchema):
     db = Database.client["heart-disease-db"]
     models_collection = db["mlmodels"]
@@ -23,27 +23,19 @@ async def create_ml_model(model: ModelSchema):
     model_data = model.dict()
     model_data["createdAt"] = datetime.utcnow()
 
-    result = await models_collection.insert_one(model_data)
-    return {"id": str(result.inserted_id), **model_data}
+    await models_collection.insert_one(model_data)  # Sets model_data["_id"]
+    return model_data
 
-@router.get("/", summary="Get all ML models", dependencies=[Depends(is_moderator)])
+@router.get("/", summary="Get all ML models", response_model=list[ModelSummaryResponse], dependencies=[Depends(is_moderator)])
 async def get_all_ml_models():
     db = Database.client["heart-disease-db"]
     models_collection = db["mlmodels"]
 
-    models = await models_collection.find({}).to_list(length=100)
-    return [
-        {
-            "id": str(model["_id"]),
-            "version": model["version"],
-            "status": model["status"],
-            "accuracy": model["accuracy"],
-            "createdAt": model["createdAt"],
-        }
-        for model in models
-    ]
-
-@router.get("/{model_id}", summary="Get details of a specific ML model", dependencies=[Depends(is_moderator)])
+    return await models_collection.find(
+        {}, {"version": 1, "status": 1, "accuracy": 1, "createdAt": 1}
+    ).to_list(length=100)
+
+@router.get("/{model_id}", summary="Get details of a specific ML model", response_model=ModelDetailResponse, dependencies=[Depends(is_moderator)])
 async def get_ml_model(model_id: str):
     db = Database.client["heart-disease-db"]
     models_collection = db["mlmodels"]
@@ -54,16 +46,7 @@ async def get_ml_model(model_id: str):
     model = await models_collection.find_one({"_id": ObjectId(model_id)})
     if not model:
         raise HTTPException(status_code=404, detail="Model not found")
-    return {
-        "id": str(model["_id"]),
-        "version": model["version"],
-        "status": model["status"],
-        "accuracy": model["accuracy"],
-        "parameters": model["parameters"],
-        "performance_metrics": model["performance_metrics"],
-        "description": model["description"],
-        "createdAt": model["createdAt"],
-    }
+    return model
 
 @router.put("/{model_id}", summary="Update an ML model", dependencies=[Depends(is_moderator)])
 async def update_ml_model(model_id: str, model: ModelSchema):
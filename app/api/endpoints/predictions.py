@@ -1,22 +1,32 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, Response
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.requests import ClientDisconnect
 from app.db.mongodb import Database
 from bson.objectid import ObjectId
-from datetime import datetime
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta
 from PIL import Image
 import numpy as np
 import tensorflow as tf
 import io
 import os
 from app.core.auth_middleware import is_moderator, get_current_user
-from app.models.prediction import PredictionSchema, NoteUpdate
+from app.core.admission import inference_slot, reject_if_overloaded
+from app.core.config import settings
+from app.models.prediction import PredictionSchema, PredictionResponse, PredictionResultResponse, NoteUpdate
+from app.models.upload import UploadSessionCreate, UploadSessionSchema, UploadSessionResponse
 import shutil
 from pathlib import Path
 from keras.utils import load_img
 
 router = APIRouter()
-UPLOAD_DIRECTORY = Path("uploaded_images")
+UPLOAD_DIRECTORY = Path(settings.upload_directory)
 UPLOAD_DIRECTORY.mkdir(parents=True, exist_ok=True)
+PARTIAL_UPLOAD_DIRECTORY = Path(settings.partial_upload_directory)
+PARTIAL_UPLOAD_DIRECTORY.mkdir(parents=True, exist_ok=True)
+ALLOWED_CONTENT_TYPES = ["image/jpeg", "image/png"]
 
 # Load the trained model (preloaded when the app starts)
 MODEL_PATH = "ResNet50ecg50epoch.h5"
@@ -39,81 +49,377 @@ def preprocess_image(image: Image.Image) -> np.ndarray:
     return img1
 
 
-@router.post("/upload", summary="Upload an ECG image and get prediction")
-async def upload_ecg_image(
-    file: UploadFile = File(...),
-    current_user: dict = Depends(get_current_user),
-):
-    # Validate file type
-    if file.content_type not in ["image/jpeg", "image/png"]:
-        raise HTTPException(status_code=400, detail="Invalid file type. Only JPEG/PNG allowed.")
-    
-    user_id = str(current_user["_id"])
-    
-    # Save file
-    file_path = os.path.join(UPLOAD_DIRECTORY, file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
+def _load_image(file_path) -> np.ndarray:
+    image = Image.open(file_path)
+    return preprocess_image(image)
+
+# Run the model on a stored image and return (result, confidence).
+# Decoding and prediction both run off the event loop so queued requests can time out.
+async def predict_ecg(file_path) -> tuple[str, int]:
     # Open and preprocess the image
     try:
-        image = Image.open(file_path)
-        preprocessed_image = preprocess_image(image)
+        preprocessed_image = await run_in_threadpool(_load_image, file_path)
+    except FileNotFoundError:
+        # Not the client's fault; the stored file went missing
+        raise HTTPException(status_code=500, detail="Uploaded image is no longer available.")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing image: {e}")
 
     # Predict using the model
     try:
-        predictions = model.predict(preprocessed_image)
+        predictions = await run_in_threadpool(model.predict, preprocessed_image)
         predicted_class = int(np.argmax(predictions[0]))  # Convert to Python int
         confidence = int(round(predictions[0][predicted_class]))  # Convert to Python float
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {e}")
+    return classnames[predicted_class], confidence
 
-    # Store the prediction in the database
+# Store the prediction in the database and return its id
+async def save_prediction(
+    user_id: str, image_url: str, result: str, confidence: int, upload_id: ObjectId | None = None
+) -> ObjectId:
     db = Database.client["heart-disease-db"]
     predictions_collection = db["predictions"]
     prediction = PredictionSchema(
         userId=user_id,
-        imageUrl=file.filename,
+        imageUrl=image_url,
         prediction={
-            "result": classnames[predicted_class],  # Ensure this is a string
+            "result": result,  # Ensure this is a string
             "confidence": confidence
         },
         notes=None,
         createdAt=datetime.utcnow(),
+        uploadId=upload_id,
     )
-    result = await predictions_collection.insert_one(prediction.dict())
+    inserted = await predictions_collection.insert_one(prediction.dict())
+    return inserted.inserted_id
+
+
+def _save_upload(source, file_path):
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(source, buffer)
+
+@router.post(
+    "/upload",
+    summary="Upload an ECG image and get prediction",
+    response_model=PredictionResultResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    }
+                }
+            },
+        }
+    },
+)
+async def upload_ecg_image(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+):
+    # Shed before receiving the body when the queue is already full, but only hold an
+    # inference slot for the prediction itself; slow uploads must not starve inference
+    reject_if_overloaded(current_user)
+
+    # Starlette spools multipart files to disk past 1MB
+    form = await request.form()
+    try:
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=400, detail="No file uploaded.")
+
+        # Validate file type
+        if file.content_type not in ALLOWED_CONTENT_TYPES:
+            raise HTTPException(status_code=400, detail="Invalid file type. Only JPEG/PNG allowed.")
+
+        user_id = str(current_user["_id"])
+
+        # Save file under a unique name; client filenames collide across users
+        image_url = f"{ObjectId()}{Path(os.path.basename(file.filename or '')).suffix}"
+        file_path = os.path.join(UPLOAD_DIRECTORY, image_url)
+        await run_in_threadpool(_save_upload, file.file, file_path)
+    finally:
+        await form.close()
+
+    async with inference_slot(current_user):
+        result, confidence = await predict_ecg(file_path)
+    prediction_id = await save_prediction(user_id, image_url, result, confidence)
 
     # Return the response
-    return JSONResponse(
-        status_code=200,
-        content={
-            "predictionId": str(result.inserted_id),
-            "result": classnames[predicted_class],
-            "confidence": confidence,
+    return PredictionResultResponse(predictionId=prediction_id, result=result, confidence=confidence)
+
+# Chunked, resumable uploads
+#
+# 1. POST   /uploads                  with an Idempotency-Key header opens (or reopens) a session
+# 2. PATCH  /uploads/{id}             appends the request body at the Upload-Offset header
+# 3. GET    /uploads/{id}             reports the committed offset to resume from after a disconnect
+# 4. POST   /uploads/{id}/complete    runs the prediction once; retries return the original result
+
+def _partial_upload_path(upload_id) -> Path:
+    return PARTIAL_UPLOAD_DIRECTORY / str(upload_id)
+
+def _upload_session_response(session: dict, response: Response) -> dict:
+    response.headers["Upload-Offset"] = str(session["offset"])
+    return session
+
+def _prediction_result(prediction: dict) -> PredictionResultResponse:
+    return PredictionResultResponse(
+        predictionId=prediction["_id"],
+        result=prediction["prediction"]["result"],
+        confidence=prediction["prediction"]["confidence"],
+    )
+
+async def _get_upload_session(upload_id: str, current_user: dict) -> dict:
+    if not ObjectId.is_valid(upload_id):
+        raise HTTPException(status_code=400, detail="Invalid upload ID.")
+
+    db = Database.client["heart-disease-db"]
+    sessions_collection = db["upload_sessions"]
+    session = await sessions_collection.find_one(
+        {"_id": ObjectId(upload_id), "userId": current_user["_id"]}
+    )
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found.")
+    return session
+
+async def _completed_prediction_result(session: dict) -> PredictionResultResponse:
+    db = Database.client["heart-disease-db"]
+    predictions_collection = db["predictions"]
+    prediction = await predictions_collection.find_one({"_id": session["predictionId"]})
+    if not prediction:
+        raise HTTPException(status_code=410, detail="Prediction for this upload no longer exists.")
+    return _prediction_result(prediction)
+
+@router.post("/uploads", summary="Start or resume a chunked ECG upload", response_model=UploadSessionResponse)
+async def create_upload_session(
+    upload: UploadSessionCreate,
+    response: Response,
+    idempotency_key: str = Header(..., min_length=1, max_length=255),
+    current_user: dict = Depends(get_current_user),
+):
+    if upload.content_type not in ALLOWED_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid file type. Only JPEG/PNG allowed.")
+    if upload.total_size > settings.upload_max_size:
+        raise HTTPException(status_code=413, detail="File is too large.")
+
+    db = Database.client["heart-disease-db"]
+    sessions_collection = db["upload_sessions"]
+    key_filter = {"userId": current_user["_id"], "idempotencyKey": idempotency_key}
+
+    # A retried request with the same key resumes the existing session
+    session = await sessions_collection.find_one(key_filter)
+    if not session:
+        now = datetime.utcnow()
+        session_data = UploadSessionSchema(
+            userId=str(current_user["_id"]),
+            idempotencyKey=idempotency_key,
+            filename=os.path.basename(upload.filename),
+            contentType=upload.content_type,
+            totalSize=upload.total_size,
+            offset=0,
+            status="uploading",
+            predictionId=None,
+            createdAt=now,
+            updatedAt=now,
+        ).dict()
+        try:
+            await sessions_collection.insert_one(session_data)
+            response.status_code = 201
+            return _upload_session_response(session_data, response)
+        except DuplicateKeyError:
+            # Lost a race against a concurrent request with the same key
+            session = await sessions_collection.find_one(key_filter)
+
+    if session["totalSize"] != upload.total_size or session["filename"] != os.path.basename(upload.filename):
+        raise HTTPException(status_code=409, detail="Idempotency key was already used for a different file.")
+    return _upload_session_response(session, response)
+
+@router.get("/uploads/{upload_id}", summary="Get the committed offset of a chunked upload", response_model=UploadSessionResponse)
+async def get_upload_session(upload_id: str, response: Response, current_user: dict = Depends(get_current_user)):
+    session = await _get_upload_session(upload_id, current_user)
+    return _upload_session_response(session, response)
+
+def _append_chunk(file_path: Path, chunk_path: Path, offset: int):
+    # Drop anything past the committed offset left behind by an interrupted append
+    with open(file_path, "r+b" if file_path.exists() else "wb") as target, open(chunk_path, "rb") as source:
+        target.truncate(offset)
+        target.seek(offset)
+        shutil.copyfileobj(source, target)
+
+def _remove_chunk(chunk_path: Path):
+    try:
+        os.remove(chunk_path)
+    except FileNotFoundError:
+        pass
+
+@router.patch("/uploads/{upload_id}", summary="Append a chunk to a chunked upload", response_model=UploadSessionResponse)
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., ge=0),
+    current_user: dict = Depends(get_current_user),
+):
+    session = await _get_upload_session(upload_id, current_user)
+    if session["status"] != "uploading":
+        raise HTTPException(status_code=409, detail="Upload is already complete.")
+    if upload_offset != session["offset"]:
+        raise HTTPException(
+            status_code=409,
+            detail="Upload-Offset does not match the committed offset.",
+            headers={"Upload-Offset": str(session["offset"])},
+        )
+
+    # Stream the body into a file of its own, so a client retrying while an older
+    # request is still streaming never shares a file handle with it
+    chunk_path = PARTIAL_UPLOAD_DIRECTORY / f"{session['_id']}.{ObjectId()}"
+    received = 0
+    try:
+        with open(chunk_path, "wb") as buffer:
+            try:
+                async for chunk in request.stream():
+                    if upload_offset + received + len(chunk) > session["totalSize"]:
+                        raise HTTPException(status_code=413, detail="Chunk exceeds the declared file size.")
+                    buffer.write(chunk)
+                    received += len(chunk)
+            except ClientDisconnect:
+                # Keep what arrived so the client can resume from here
+                pass
+
+        # Lock the session at this offset; only one request can append there
+        db = Database.client["heart-disease-db"]
+        sessions_collection = db["upload_sessions"]
+        now = datetime.utcnow()
+        claimed = await sessions_collection.find_one_and_update(
+            {
+                "_id": session["_id"],
+                "status": "uploading",
+                "offset": upload_offset,
+                "$or": [{"appendingUntil": None}, {"appendingUntil": {"$lt": now}}],
+            },
+            {"$set": {"appendingUntil": now + timedelta(seconds=settings.upload_processing_lease)}},
+        )
+        if not claimed:
+            session = await _get_upload_session(upload_id, current_user)
+            raise HTTPException(
+                status_code=409,
+                detail="Upload was modified concurrently.",
+                headers={"Upload-Offset": str(session["offset"])},
+            )
+
+        try:
+            await run_in_threadpool(_append_chunk, _partial_upload_path(session["_id"]), chunk_path, upload_offset)
+        except Exception:
+            await sessions_collection.update_one({"_id": session["_id"]}, {"$set": {"appendingUntil": None}})
+            raise
+
+        # Commit the new offset and release the lock in one step
+        offset = upload_offset + received
+        await sessions_collection.update_one(
+            {"_id": session["_id"]},
+            {"$set": {"offset": offset, "appendingUntil": None, "updatedAt": datetime.utcnow()}},
+        )
+    finally:
+        await run_in_threadpool(_remove_chunk, chunk_path)
+
+    session["offset"] = offset
+    return _upload_session_response(session, response)
+
+@router.post("/uploads/{upload_id}/complete", summary="Finish a chunked upload and get prediction", response_model=PredictionResultResponse)
+async def complete_upload(upload_id: str, current_user: dict = Depends(get_current_user)):
+    session = await _get_upload_session(upload_id, current_user)
+    if session["status"] == "completed":
+        return await _completed_prediction_result(session)
+    if session["offset"] != session["totalSize"]:
+        raise HTTPException(
+            status_code=409,
+            detail="Upload is incomplete.",
+            headers={"Upload-Offset": str(session["offset"])},
+        )
+
+    # Claim the session so concurrent retries don't run the model twice
+    db = Database.client["heart-disease-db"]
+    sessions_collection = db["upload_sessions"]
+    now = datetime.utcnow()
+    lease_expired = now - timedelta(seconds=settings.upload_processing_lease)
+    claimed = await sessions_collection.find_one_and_update(
+        {
+            "_id": session["_id"],
+            "$or": [
+                {"status": "uploading"},
+                {"status": "processing", "updatedAt": {"$lt": lease_expired}},
+            ],
         },
+        {"$set": {"status": "processing", "updatedAt": now}},
     )
+    if not claimed:
+        session = await _get_upload_session(upload_id, current_user)
+        if session["status"] == "completed":
+            return await _completed_prediction_result(session)
+        raise HTTPException(
+            status_code=409,
+            detail="Upload is already being processed.",
+            headers={"Retry-After": str(settings.inference_retry_after)},
+        )
 
-@router.get("/", summary="Get all predictions", dependencies=[Depends(is_moderator)])
+    image_url = f"{session['_id']}{Path(session['filename']).suffix}"
+    partial_path = _partial_upload_path(session["_id"])
+    final_path = UPLOAD_DIRECTORY / image_url
+    predictions_collection = db["predictions"]
+    try:
+        # An earlier attempt may have stored the prediction before it could mark the session
+        prediction = await predictions_collection.find_one({"uploadId": session["_id"]})
+        if not prediction:
+            if final_path.exists() and not partial_path.exists():
+                # An earlier attempt moved the file into place, then died before storing the prediction
+                os.replace(final_path, partial_path)
+            if not partial_path.exists():
+                # The data is gone (e.g. swept while unreferenced); make the client upload it again
+                await sessions_collection.update_one(
+                    {"_id": session["_id"]},
+                    {"$set": {"offset": 0, "status": "uploading", "updatedAt": datetime.utcnow()}},
+                )
+                raise HTTPException(
+                    status_code=409,
+                    detail="Uploaded data is no longer available. Please upload the file again.",
+                    headers={"Upload-Offset": "0"},
+                )
+            async with inference_slot(current_user):
+                result, confidence = await predict_ecg(partial_path)
+            os.replace(partial_path, final_path)
+            try:
+                await save_prediction(str(current_user["_id"]), image_url, result, confidence, upload_id=session["_id"])
+            except DuplicateKeyError:
+                # A concurrent attempt that outlived its lease got there first
+                pass
+            prediction = await predictions_collection.find_one({"uploadId": session["_id"]})
+    except Exception:
+        # Put the file back and release the claim so the client can retry
+        if final_path.exists() and not partial_path.exists():
+            os.replace(final_path, partial_path)
+        await sessions_collection.update_one(
+            {"_id": session["_id"]},
+            {"$set": {"status": "uploading", "updatedAt": datetime.utcnow()}},
+        )
+        raise
+
+    await sessions_collection.update_one(
+        {"_id": session["_id"]},
+        {"$set": {"status": "completed", "predictionId": prediction["_id"], "updatedAt": datetime.utcnow()}},
+    )
+    return _prediction_result(prediction)
+
+@router.get("/", summary="Get all predictions", response_model=list[PredictionResponse], dependencies=[Depends(is_moderator)])
 async def get_all_predictions():
     db = Database.client["heart-disease-db"]
     predictions_collection = db["predictions"]
 
-    predictions = await predictions_collection.find({}).to_list(length=100)
-    # Format predictions to ensure JSON serializability
-    formatted_predictions = [
-        {
-            "id": str(pred["_id"]),
-            "userId": str(pred["userId"]),
-            "imageUrl": pred["imageUrl"],
-            "prediction": pred["prediction"],
-            "notes": pred.get("notes"),
-            "createdAt": pred["createdAt"].isoformat() if "createdAt" in pred else None,
-        }
-        for pred in predictions
-    ]
-    return formatted_predictions
+    return await predictions_collection.find({}).to_list(length=100)
 
 @router.get("/image/{filename}", summary="Retrieve uploaded image")
 async def get_uploaded_image(filename: str):
@@ -135,7 +441,7 @@ async def list_uploaded_images():
     files = os.listdir(UPLOAD_DIRECTORY)
     return {"files": files}
 
-@router.get("/{user_id}", summary="Get all predictions for a user")
+@router.get("/{user_id}", summary="Get all predictions for a user", response_model=list[PredictionResponse])
 async def get_user_predictions(user_id: str):
     # Ensure the user_id is valid
     if not ObjectId.is_valid(user_id):
@@ -145,21 +451,7 @@ async def get_user_predictions(user_id: str):
     predictions_collection = db["predictions"]
 
     # Fetch predictions from the database
-    predictions = await predictions_collection.find({"userId": ObjectId(user_id)}).to_list(length=100)
-
-    # Format the response
-    formatted_predictions = [
-        {
-            "id": str(pred["_id"]),
-            "userId": str(pred["userId"]),
-            "imageUrl": pred["imageUrl"],
-            "notes": pred["notes"],
-            "prediction": pred["prediction"],
-            "createdAt": pred["createdAt"],
-        }
-        for pred in predictions
-    ]
-    return formatted_predictions
+    return await predictions_collection.find({"userId": ObjectId(user_id)}).to_list(length=100)
 
 @router.patch("/{prediction_id}", summary="Update notes for a prediction")
 async def update_prediction_notes(prediction_id: str,note_update: NoteUpdate,current_user: dict = Depends(get_current_user)):
@@ -3,6 +3,8 @@ from pydantic import BaseModel
 from bson.objectid import ObjectId
 from app.db.mongodb import Database
 from app.core.auth_middleware import is_moderator, get_current_user
+from app.services.retention import purge_user_data
+from app.models.user import UserResponse, UserDetailResponse
 
 router = APIRouter()
 
@@ -12,29 +14,22 @@ class UserUpdate(BaseModel):
     role: str = None  # Enum: 'user', 'moderator', 'admin'
     isBlocked: bool = None
 
-@router.get("/me", summary="Get current user details")
+# Everything a user response needs; keeps password hashes out of the query results
+USER_PROJECTION = {"email": 1, "role": 1, "isBlocked": 1, "createdAt": 1}
+
+@router.get("/me", summary="Get current user details", response_model=UserResponse)
 async def get_current_user_details(current_user: dict = Depends(get_current_user)):
-    return {
-        "id": str(current_user["_id"]),
-        "email": current_user["email"],
-        "role": current_user["role"],
-    }
+    return current_user
 
-@router.get("/{user_id}", summary="Get user details", dependencies=[Depends(is_moderator)])
+@router.get("/{user_id}", summary="Get user details", response_model=UserDetailResponse, dependencies=[Depends(is_moderator)])
 async def get_user(user_id: str):
     db = Database.client["heart-disease-db"]
     users_collection = db["users"]
 
-    user = await users_collection.find_one({"_id": ObjectId(user_id)})
+    user = await users_collection.find_one({"_id": ObjectId(user_id)}, USER_PROJECTION)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return {
-        "id": str(user["_id"]),
-        "email": user["email"],
-        "role": user["role"],
-        "isBlocked": user["isBlocked"],
-        "createdAt": user["createdAt"],
-    }
+    return user
 
 @router.patch("/{user_id}", summary="Update user details", dependencies=[Depends(is_moderator)])
 async def update_user(user_id: str, updates: UserUpdate):
@@ -58,27 +53,33 @@ async def delete_user(user_id: str):
     db = Database.client["heart-disease-db"]
     users_collection = db["users"]
 
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=400, detail="Invalid user ID")
+
+    if not await users_collection.find_one({"_id": ObjectId(user_id)}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Remove their predictions and uploads first, so a failed cascade can be retried;
+    # image files are removed in the background
+    deleted = await purge_user_data(ObjectId(user_id))
+
     result = await users_collection.delete_one({"_id": ObjectId(user_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
-    return {"message": "User deleted successfully"}
 
-@router.get("/", summary="Get all users", dependencies=[Depends(is_moderator)])
+    # Purge again: uploads the user completed between the first purge and the delete
+    # would otherwise be orphaned. Blocking first would not help, since get_current_user
+    # does not check isBlocked; once the document is gone, new requests get a 404.
+    late = await purge_user_data(ObjectId(user_id))
+    deleted = {key: count + late[key] for key, count in deleted.items()}
+    return {"message": "User deleted successfully", "deleted": deleted}
+
+@router.get("/", summary="Get all users", response_model=list[UserDetailResponse], dependencies=[Depends(is_moderator)])
 async def get_all_users():
     db = Database.client["heart-disease-db"]
     users_collection = db["users"]
 
-    users = await users_collection.find({}).to_list(length=100)
-    return [
-        {
-            "id": str(user["_id"]),
-            "email": user["email"],
-            "role": user["role"],
-            "isBlocked": user["isBlocked"],
-            "createdAt": user["createdAt"],
-        }
-        for user in users
-    ]
+    return await users_collection.find({}, USER_PROJECTION).to_list(length=100)
 
 @router.patch("/{user_id}/block", summary="Block or unblock a user", dependencies=[Depends(is_moderator)])
 async def block_unblock_user(user_id: str, block: bool):
@@ -1,8 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from app.api.endpoints.auth import router as auth_router
 from app.api.endpoints.user import router as user_router
 from app.api.endpoints.predictions import router as predictions_router
 from app.api.endpoints.mlmodels import router as mlmodels_router
+from app.core.admission import inference_admission
+from app.core.auth_middleware import is_moderator
 
 router = APIRouter()
 
@@ -16,5 +18,9 @@ router.include_router(mlmodels_router, prefix="/mlmodels", tags=["ML Models"])
 async def root():
     return {"message": "Welcome to the Heart Disease Prediction API"}
 
+@router.get("/metrics/admission", tags=["Root"], summary="Inference queue depth and shed counts", dependencies=[Depends(is_moderator)])
+async def admission_metrics():
+    return inference_admission.stats()
+
 # Export router
 api_router = router
@@ -0,0 +1,133 @@
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from app.core.config import settings
+
+# Lower value is served first; unknown roles get the lowest priority
+ROLE_PRIORITY = {"admin": 0, "moderator": 0, "user": 1}
+DEFAULT_PRIORITY = 1
+
+
+class AdmissionController:
+    """Bounded in-flight budget with a bounded, priority-ordered wait queue."""
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float, retry_after: int):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.admitted_total = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+
+    def _overloaded(self):
+        return HTTPException(
+            status_code=503,
+            detail="Server is busy processing other predictions. Please retry later.",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    def would_shed(self, priority: int = DEFAULT_PRIORITY) -> bool:
+        # Queue is full and holds nobody this caller outranks
+        if len(self._waiters) < self.max_queue:
+            return False
+        victim = max(self._waiters, default=None)
+        return victim is None or victim[0] <= priority
+
+    def shed_if_overloaded(self, priority: int = DEFAULT_PRIORITY):
+        # Non-blocking check for callers that must do work (e.g. receive a body) before queueing
+        if self.would_shed(priority):
+            self.shed_queue_full += 1
+            raise self._overloaded()
+
+    async def acquire(self, priority: int = DEFAULT_PRIORITY):
+        # Fast path: free slot and nobody ahead of us
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted_total += 1
+            return
+
+        self.shed_if_overloaded(priority)
+        if len(self._waiters) >= self.max_queue:
+            # Make room by shedding the lowest-priority, newest waiter; we outrank it
+            victim = max(self._waiters)
+            self._waiters.remove(victim)
+            heapq.heapify(self._waiters)
+            victim[2].set_exception(self._overloaded())
+            self.shed_queue_full += 1
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # The slot was handed over just as we gave up; pass it on
+                self.release()
+            elif entry in self._waiters:
+                future.cancel()
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if isinstance(e, asyncio.TimeoutError):
+                self.shed_timeout += 1
+                raise self._overloaded()
+            raise
+        self.admitted_total += 1
+
+    def release(self):
+        # Hand the slot directly to the highest-priority waiter, if any
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        queued_by_priority = {}
+        for priority, _, _ in self._waiters:
+            key = str(priority)
+            queued_by_priority[key] = queued_by_priority.get(key, 0) + 1
+        return {
+            "inFlight": self.in_flight,
+            "maxInFlight": self.max_in_flight,
+            "queued": len(self._waiters),
+            "maxQueue": self.max_queue,
+            "queuedByPriority": queued_by_priority,
+            "admittedTotal": self.admitted_total,
+            "shedTotal": self.shed_queue_full + self.shed_timeout,
+            "shedQueueFull": self.shed_queue_full,
+            "shedTimeout": self.shed_timeout,
+        }
+
+
+inference_admission = AdmissionController(
+    max_in_flight=settings.inference_max_in_flight,
+    max_queue=settings.inference_max_queue,
+    queue_timeout=settings.inference_queue_timeout,
+    retry_after=settings.inference_retry_after,
+)
+
+
+def _priority(user: dict) -> int:
+    # Priority comes from the caller's role
+    return ROLE_PRIORITY.get(user.get("role"), DEFAULT_PRIORITY)
+
+
+def reject_if_overloaded(user: dict):
+    inference_admission.shed_if_overloaded(_priority(user))
+
+
+@asynccontextmanager
+async def inference_slot(user: dict):
+    await inference_admission.acquire(_priority(user))
+    try:
+        yield
+    finally:
+        inference_admission.release()
@@ -6,6 +6,28 @@ class Settings(BaseSettings):
     jwt_expires_in: int
     port: int
 
+    # Inference admission control
+    inference_max_in_flight: int = 4  # Concurrent model.predict calls
+    inference_max_queue: int = 16  # Requests allowed to wait for a slot
+    inference_queue_timeout: float = 10.0  # Seconds a request may wait before being shed
+    inference_retry_after: int = 5  # Seconds advertised in Retry-After on 503
+
+    # Storage
+    upload_directory: str = "uploaded_images"
+    partial_upload_directory: str = "upload_sessions"  # In-progress chunked uploads
+
+    # Chunked uploads
+    upload_max_size: int = 50 * 1024 * 1024  # Largest accepted ECG scan in bytes
+    upload_processing_lease: int = 300  # Seconds before a stuck append or completion can be retried
+
+    # Retention
+    prediction_retention_days: int = 0  # 0 keeps predictions (and their images) forever
+    upload_session_retention_hours: int = 24  # TTL for upload sessions and their idempotency keys
+    retention_sweep_interval: int = 3600  # Seconds between background sweeps
+    retention_batch_size: int = 500  # Documents removed per delete_many
+    file_delete_rate: float = 20.0  # Files removed per second by the background reaper
+    sweep_orphaned_images: bool = False  # Also delete unreferenced files in upload_directory
+
     class Config:
         env_file = ".env"
 
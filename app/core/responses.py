@@ -0,0 +1,8 @@
+import orjson
+from fastapi.responses import ORJSONResponse
+from app.models.pydantic_objectid import encode_bson
+
+
+class FastJSONResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=encode_bson, option=orjson.OPT_SERIALIZE_NUMPY)
@@ -1,5 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from fastapi import HTTPException
+from pymongo.errors import OperationFailure
+from app.core.config import settings
 
 class Database:
     client: AsyncIOMotorClient = None
@@ -12,6 +14,37 @@ class Database:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Database connection error: {e}")
 
+    @staticmethod
+    async def ensure_indexes():
+        db = Database.client["heart-disease-db"]
+        # One upload session per client-supplied idempotency key
+        await db["upload_sessions"].create_index(
+            [("userId", 1), ("idempotencyKey", 1)], unique=True
+        )
+
+        # Expire stale upload sessions; completed ones keep their idempotency key this long
+        session_ttl = settings.upload_session_retention_hours * 3600
+        try:
+            await db["upload_sessions"].create_index(
+                "updatedAt", name="updatedAt_ttl", expireAfterSeconds=session_ttl
+            )
+        except OperationFailure:
+            # TTL changed since the index was created
+            await db.command(
+                "collMod", "upload_sessions",
+                index={"name": "updatedAt_ttl", "expireAfterSeconds": session_ttl},
+            )
+
+        # Retention sweeps and cascading deletes select predictions by these fields
+        await db["predictions"].create_index("createdAt")
+        await db["predictions"].create_index("userId")
+        await db["predictions"].create_index("imageUrl")
+
+        # At most one prediction per chunked upload, even if completion is retried
+        await db["predictions"].create_index(
+            "uploadId", unique=True, partialFilterExpression={"uploadId": {"$type": "objectId"}}
+        )
+
     @staticmethod
     async def close_mongo_connection():
         if Database.client:
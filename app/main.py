@@ -3,10 +3,12 @@ from app.db.mongodb import Database
 from app.core.config import settings
 from app.api.routes import api_router
 from app.ml.model import ModelManager
+from app.services.retention import RetentionManager
+from app.core.responses import FastJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
-app = FastAPI(title="Heart Disease Prediction API")
+app = FastAPI(title="Heart Disease Prediction API", default_response_class=FastJSONResponse)
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "../ResNet50ecg50epoch.h5")
 
@@ -23,10 +25,13 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     await Database.connect_to_mongo(settings.mongodb_uri)
+    await Database.ensure_indexes()
     ModelManager.load_model(MODEL_PATH)
+    RetentionManager.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await RetentionManager.stop()
     await Database.close_mongo_connection()
 
 app.include_router(api_router) 
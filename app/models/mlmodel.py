@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from app.models.response import DocumentResponse
 
 class ModelParameters(BaseModel):
     learning_rate: float
@@ -20,3 +21,18 @@ class ModelSchema(BaseModel):
     status: str  # "active" or "archived"
     description: str
     createdAt: datetime | None
+
+class ModelSummaryResponse(DocumentResponse):
+    version: str
+    status: str
+    accuracy: float
+    createdAt: datetime | None
+
+class ModelDetailResponse(ModelSummaryResponse):
+    model_url: str | None = None
+    parameters: ModelParameters
+    performance_metrics: PerformanceMetrics
+    description: str
+    model_config = {
+        "protected_namespaces": (),
+    }
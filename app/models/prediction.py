@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 from app.models.pydantic_objectid import PydanticObjectId
+from app.models.response import DocumentResponse
 
 class Diagnosis(BaseModel):
     result: str = Field(..., description="Result string response")
@@ -12,9 +13,25 @@ class PredictionSchema(BaseModel):
     prediction: Diagnosis
     notes: str | None
     createdAt: datetime
+    uploadId: PydanticObjectId | None = None  # Chunked upload session that produced it
     model_config = {
         "arbitrary_types_allowed": True,
     }
 
 class NoteUpdate(BaseModel):
-    notes: str
\ No newline at end of file
+    notes: str
+
+class PredictionResponse(DocumentResponse):
+    userId: PydanticObjectId
+    imageUrl: str
+    prediction: Diagnosis
+    notes: str | None = None
+    createdAt: datetime | None = None
+
+class PredictionResultResponse(BaseModel):
+    predictionId: PydanticObjectId
+    result: str
+    confidence: int
+    model_config = {
+        "arbitrary_types_allowed": True,
+    }
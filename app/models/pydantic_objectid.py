@@ -9,15 +9,21 @@ class PydanticObjectId(ObjectId):
     def __get_pydantic_core_schema__(
         cls, source: type, handler: GetCoreSchemaHandler
     ) -> core_schema.CoreSchema:
-        # Validation function for ObjectId
-        def validate(value: str) -> ObjectId:
+        # Validation function for ObjectId; documents read from Mongo already hold ObjectIds
+        def validate(value) -> ObjectId:
+            if isinstance(value, ObjectId):
+                return value
             if not ObjectId.is_valid(value):
                 raise ValueError(f"Invalid ObjectId: {value}")
             return ObjectId(value)
 
-        # Generate schema using a callable validator
-        return core_schema.no_info_after_validator_function(
-            validate, core_schema.str_schema()
+        # Stays an ObjectId in python mode (for inserts), becomes a string in JSON mode
+        return core_schema.json_or_python_schema(
+            json_schema=core_schema.no_info_after_validator_function(
+                validate, core_schema.str_schema()
+            ),
+            python_schema=core_schema.no_info_plain_validator_function(validate),
+            serialization=core_schema.to_string_ser_schema(when_used="json"),
         )
 
     @classmethod
@@ -26,5 +32,9 @@ class PydanticObjectId(ObjectId):
     ) -> JsonSchemaValue:
         return {"type": "string", "format": "objectid"}
 
-    def __str__(self):
-        return str(self)
+
+def encode_bson(value):
+    # orjson `default` hook: datetimes are native to orjson, ObjectIds are not
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
@@ -0,0 +1,9 @@
+from pydantic import AliasChoices, BaseModel, Field
+from app.models.pydantic_objectid import PydanticObjectId
+
+class DocumentResponse(BaseModel):
+    # Mongo documents are validated as-is; `_id` is exposed as `id`
+    id: PydanticObjectId = Field(..., validation_alias=AliasChoices("_id", "id"))
+    model_config = {
+        "arbitrary_types_allowed": True,
+    }
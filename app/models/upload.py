@@ -0,0 +1,34 @@
+from pydantic import AliasChoices, BaseModel, Field
+from datetime import datetime
+from app.models.pydantic_objectid import PydanticObjectId
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: str = Field(..., description="image/jpeg or image/png")
+    total_size: int = Field(..., gt=0, description="Size of the full file in bytes")
+
+class UploadSessionSchema(BaseModel):
+    userId: PydanticObjectId
+    idempotencyKey: str
+    filename: str
+    contentType: str
+    totalSize: int
+    offset: int
+    status: str  # "uploading", "processing" or "completed"
+    predictionId: PydanticObjectId | None
+    createdAt: datetime
+    updatedAt: datetime
+    model_config = {
+        "arbitrary_types_allowed": True,
+    }
+
+class UploadSessionResponse(BaseModel):
+    uploadId: PydanticObjectId = Field(..., validation_alias=AliasChoices("_id", "uploadId"))
+    filename: str
+    totalSize: int
+    offset: int
+    status: str
+    predictionId: PydanticObjectId | None = None
+    model_config = {
+        "arbitrary_types_allowed": True,
+    }
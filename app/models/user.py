@@ -2,6 +2,7 @@ from pydantic import BaseModel, EmailStr
 from datetime import datetime
 from enum import Enum
 from app.models.pydantic_objectid import PydanticObjectId
+from app.models.response import DocumentResponse
 
 class UserLogin(BaseModel):
     email: str
@@ -24,3 +25,11 @@ class UserSchema(BaseModel):
     model_config = {
         "arbitrary_types_allowed": True,
     }
+
+class UserResponse(DocumentResponse):
+    email: str
+    role: str
+
+class UserDetailResponse(UserResponse):
+    isBlocked: bool
+    createdAt: datetime
@@ -0,0 +1,211 @@
+import asyncio
+import functools
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from bson import ObjectId
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.db.mongodb import Database
+
+UPLOAD_DIRECTORY = Path(settings.upload_directory)
+PARTIAL_UPLOAD_DIRECTORY = Path(settings.partial_upload_directory)
+BATCH_PAUSE = 0.05  # Seconds between delete batches so sweeps don't hog the database
+ORPHAN_GRACE_PERIOD = 3600  # Seconds an unreferenced image is left alone, covering uploads still in flight
+
+
+def _list_stale_files(directory: Path, older_than: float) -> list[str]:
+    # ctime also moves when a chunked upload is renamed into place
+    with os.scandir(directory) as entries:
+        return [
+            entry.name
+            for entry in entries
+            if entry.is_file() and max(entry.stat().st_mtime, entry.stat().st_ctime) < older_than
+        ]
+
+
+def _remove_file(path: Path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class FileReaper:
+    """Removes files in the background at a bounded rate."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.removed_total = 0
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def enqueue(self, paths, keep=None):
+        # `keep` is an optional async check run right before removal; a truthy result spares the file
+        for path in paths:
+            self._queue.put_nowait((path, keep))
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            path, keep = await self._queue.get()
+            try:
+                if keep is None or not await keep(path):
+                    await run_in_threadpool(_remove_file, path)
+                    self.removed_total += 1
+            except Exception as e:
+                print(f"Failed to remove {path}: {e}")
+            await asyncio.sleep(self.interval)
+
+
+file_reaper = FileReaper(settings.file_delete_rate)
+
+
+async def _image_in_use(image_url: str, path: Path) -> bool:
+    # Checked at removal time: a new upload may have reused the name since it was queued
+    db = Database.client["heart-disease-db"]
+    return await db["predictions"].find_one({"imageUrl": image_url}, {"_id": 1}) is not None
+
+
+async def purge_predictions(query: dict) -> int:
+    """Delete matching predictions in batches and queue their images for removal."""
+    db = Database.client["heart-disease-db"]
+    predictions_collection = db["predictions"]
+
+    deleted = 0
+    while True:
+        batch = await predictions_collection.find(query, {"imageUrl": 1}).limit(
+            settings.retention_batch_size
+        ).to_list(length=settings.retention_batch_size)
+        if not batch:
+            return deleted
+
+        result = await predictions_collection.delete_many({"_id": {"$in": [pred["_id"] for pred in batch]}})
+        deleted += result.deleted_count
+
+        # Older single-shot uploads kept client filenames, so an image may be shared
+        for url in {pred["imageUrl"] for pred in batch if pred.get("imageUrl")}:
+            file_reaper.enqueue(
+                [UPLOAD_DIRECTORY / os.path.basename(url)], keep=functools.partial(_image_in_use, url)
+            )
+        await asyncio.sleep(BATCH_PAUSE)
+
+
+async def purge_upload_sessions(query: dict) -> int:
+    """Delete matching upload sessions in batches and queue their partial files for removal."""
+    db = Database.client["heart-disease-db"]
+    sessions_collection = db["upload_sessions"]
+
+    deleted = 0
+    while True:
+        batch = await sessions_collection.find(query, {"_id": 1}).limit(
+            settings.retention_batch_size
+        ).to_list(length=settings.retention_batch_size)
+        if not batch:
+            return deleted
+
+        session_ids = [session["_id"] for session in batch]
+        result = await sessions_collection.delete_many({"_id": {"$in": session_ids}})
+        deleted += result.deleted_count
+        file_reaper.enqueue(PARTIAL_UPLOAD_DIRECTORY / str(session_id) for session_id in session_ids)
+        await asyncio.sleep(BATCH_PAUSE)
+
+
+async def purge_user_data(user_id: ObjectId) -> dict:
+    """Cascade a user deletion to everything they own."""
+    return {
+        "predictions": await purge_predictions({"userId": user_id}),
+        "uploadSessions": await purge_upload_sessions({"userId": user_id}),
+    }
+
+
+async def _purge_orphaned_partial_uploads():
+    # Sessions expire through their TTL index, which leaves partial files behind.
+    # Files are named "<sessionId>" or "<sessionId>.<requestId>" for chunks in flight.
+    names = await run_in_threadpool(os.listdir, PARTIAL_UPLOAD_DIRECTORY)
+    files_by_session = {}
+    for name in names:
+        session_id = name.split(".")[0]
+        if ObjectId.is_valid(session_id):
+            files_by_session.setdefault(ObjectId(session_id), []).append(name)
+
+    session_ids = list(files_by_session)
+    db = Database.client["heart-disease-db"]
+    for start in range(0, len(session_ids), settings.retention_batch_size):
+        chunk = session_ids[start:start + settings.retention_batch_size]
+        live = await db["upload_sessions"].distinct("_id", {"_id": {"$in": chunk}})
+        file_reaper.enqueue(
+            PARTIAL_UPLOAD_DIRECTORY / name
+            for session_id in set(chunk) - set(live)
+            for name in files_by_session[session_id]
+        )
+
+
+async def _purge_orphaned_images():
+    # Removals still queued when the process stopped are lost; nothing references those files anymore
+    names = await run_in_threadpool(_list_stale_files, UPLOAD_DIRECTORY, time.time() - ORPHAN_GRACE_PERIOD)
+    db = Database.client["heart-disease-db"]
+    for start in range(0, len(names), settings.retention_batch_size):
+        chunk = names[start:start + settings.retention_batch_size]
+        used = await db["predictions"].distinct("imageUrl", {"imageUrl": {"$in": chunk}})
+        for name in set(chunk) - set(used):
+            file_reaper.enqueue([UPLOAD_DIRECTORY / name], keep=functools.partial(_image_in_use, name))
+        await asyncio.sleep(BATCH_PAUSE)
+
+
+async def sweep_expired():
+    if settings.prediction_retention_days > 0:
+        cutoff = datetime.utcnow() - timedelta(days=settings.prediction_retention_days)
+        deleted = await purge_predictions({"createdAt": {"$lt": cutoff}})
+        if deleted:
+            print(f"Retention sweep removed {deleted} predictions older than {cutoff.isoformat()}")
+    await _purge_orphaned_partial_uploads()
+    # Opt-in: anything in upload_directory that no prediction references is deleted
+    if settings.sweep_orphaned_images:
+        await _purge_orphaned_images()
+
+
+class RetentionManager:
+    task: asyncio.Task = None
+
+    @staticmethod
+    async def _run():
+        while True:
+            try:
+                await sweep_expired()
+            except Exception as e:
+                print(f"Retention sweep failed: {e}")
+            await asyncio.sleep(settings.retention_sweep_interval)
+
+    @staticmethod
+    def start():
+        file_reaper.start()
+        if RetentionManager.task is None:
+            RetentionManager.task = asyncio.create_task(RetentionManager._run())
+
+    @staticmethod
+    async def stop():
+        if RetentionManager.task is not None:
+            RetentionManager.task.cancel()
+            try:
+                await RetentionManager.task
+            except asyncio.CancelledError:
+                pass
+            RetentionManager.task = None
+        await file_reaper.stop()
@@ -0,0 +1,82 @@
+# Compares response serialization CPU for a page of predictions.
+#
+#   python -m benchmarks.serialization [page_size ...]
+#
+# "legacy" is the old path: per-endpoint dict comprehension, FastAPI's jsonable_encoder
+# and the stdlib JSONResponse. "typed" is the current path: the response_model validates
+# the raw Mongo documents and FastJSONResponse renders them with orjson.
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.core.responses import FastJSONResponse
+from app.models.prediction import PredictionResponse
+
+ROUNDS = 20
+
+
+def make_page(size: int) -> list[dict]:
+    user_id = ObjectId()
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "userId": user_id,
+            "imageUrl": f"scan_{i}.png",
+            "prediction": {"result": "Normal", "confidence": 1.0},
+            "notes": None if i % 2 else "Follow up in two weeks",
+            "createdAt": now - timedelta(minutes=i),
+        }
+        for i in range(size)
+    ]
+
+
+async def legacy(page: list[dict]) -> bytes:
+    formatted = [
+        {
+            "id": str(pred["_id"]),
+            "userId": str(pred["userId"]),
+            "imageUrl": pred["imageUrl"],
+            "prediction": pred["prediction"],
+            "notes": pred.get("notes"),
+            "createdAt": pred["createdAt"].isoformat() if "createdAt" in pred else None,
+        }
+        for pred in page
+    ]
+    content = await serialize_response(response_content=formatted)
+    return JSONResponse(content).body
+
+
+async def typed(page: list[dict], field) -> bytes:
+    content = await serialize_response(field=field, response_content=page)
+    return FastJSONResponse(content).body
+
+
+def measure(fn) -> float:
+    # Best-of CPU time in milliseconds
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.process_time()
+        asyncio.run(fn())
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+
+def main(sizes: list[int]):
+    field = create_response_field(name="Response", type_=list[PredictionResponse])
+    print(f"{'page':>8} {'legacy ms':>10} {'typed ms':>10} {'speedup':>8}")
+    for size in sizes:
+        page = make_page(size)
+        assert jsonable_encoder(asyncio.run(typed(page, field))) == jsonable_encoder(asyncio.run(legacy(page)))
+        legacy_ms = measure(lambda: legacy(page))
+        typed_ms = measure(lambda: typed(page, field))
+        print(f"{size:>8} {legacy_ms:>10.2f} {typed_ms:>10.2f} {legacy_ms / typed_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000])